@@ -27,7 +27,10 @@ import hashlib
 import base64
 import hmac
 import os
+import re
 import json
+from collections import namedtuple
+from functools import lru_cache, wraps
 
 import ecdsa
 import pyaes
@@ -59,8 +62,26 @@ XPUB_HEADERS = {
 }
 
 
+# immutable snapshot of the address and key prefixes of a network
+NetworkParams = namedtuple('NetworkParams', [
+    'TESTNET', 'WIF_PREFIX', 'ADDRTYPE_P2PKH', 'ADDRTYPE_P2SH',
+    'DRKV_HEADER', 'DRKP_HEADER', 'XPRV_HEADER', 'XPUB_HEADER'])
+
+
 class NetworkConstants:
 
+    @classmethod
+    def current(cls):
+        """Frozen NetworkParams of the active network."""
+        return cls._params
+
+    @classmethod
+    def _freeze(cls):
+        cls._params = NetworkParams(
+            cls.TESTNET, cls.WIF_PREFIX, cls.ADDRTYPE_P2PKH, cls.ADDRTYPE_P2SH,
+            cls.DRKV_HEADER, cls.DRKP_HEADER,
+            XPRV_HEADERS['standard'], XPUB_HEADERS['standard'])
+
     @classmethod
     def set_mainnet(cls):
         cls.TESTNET = False
@@ -76,6 +97,7 @@ class NetworkConstants:
         cls.HEADER_SIZE = 112  # basic header size
         XPRV_HEADERS['standard'] = 0x0221312b
         XPUB_HEADERS['standard'] = 0x022d2533
+        cls._freeze()
 
     @classmethod
     def set_testnet(cls):
@@ -92,10 +114,30 @@ class NetworkConstants:
         cls.HEADER_SIZE = 112  # basic header size
         XPRV_HEADERS['standard'] = 0x04358394
         XPUB_HEADERS['standard'] = 0x043587cf
+        cls._freeze()
 
 
 NetworkConstants.set_mainnet()
 
+
+def network_cached(func):
+    """Memoize func on its arguments and the active network.
+
+    Only for functions of immutable arguments that return immutable
+    values and depend on nothing but NetworkConstants. Never use it on
+    anything that takes or returns private keys: the cache would keep
+    them in memory for the life of the process."""
+    @lru_cache(maxsize=1024)
+    def cached(net, *args):
+        return func(*args)
+
+    @wraps(func)
+    def wrapper(*args):
+        return cached(NetworkConstants.current(), *args)
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.cache_info = cached.cache_info
+    return wrapper
+
 ################################## transactions
 
 MAX_FEE_RATE = 10000
@@ -110,6 +152,13 @@ TYPE_PUBKEY  = 1
 TYPE_SCRIPT  = 2
 
 # AES encryption
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.backends import default_backend
+    _cryptography_backend = default_backend()
+except:
+    Cipher = None
+
 try:
     from Cryptodome.Cipher import AES
 except:
@@ -142,7 +191,10 @@ def strip_PKCS7_padding(data):
 def aes_encrypt_with_iv(key, iv, data):
     assert_bytes(key, iv, data)
     data = append_PKCS7_padding(data)
-    if AES:
+    if Cipher:
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv), backend=_cryptography_backend).encryptor()
+        e = encryptor.update(data) + encryptor.finalize()
+    elif AES:
         e = AES.new(key, AES.MODE_CBC, iv).encrypt(data)
     else:
         aes_cbc = pyaes.AESModeOfOperationCBC(key, iv=iv)
@@ -153,7 +205,10 @@ def aes_encrypt_with_iv(key, iv, data):
 
 def aes_decrypt_with_iv(key, iv, data):
     assert_bytes(key, iv, data)
-    if AES:
+    if Cipher:
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv), backend=_cryptography_backend).decryptor()
+        data = decryptor.update(data) + decryptor.finalize()
+    elif AES:
         cipher = AES.new(key, AES.MODE_CBC, iv)
         data = cipher.decrypt(data)
     else:
@@ -210,40 +265,53 @@ def int_to_hex(i, length=1):
     return rev_hex(s)
 
 
+# hex of every single byte value, for the one-byte cases below
+_HEX_BYTE = tuple('%02x' % i for i in range(256))
+
+
 def var_int(i):
     # https://en.bitcoin.it/wiki/Protocol_specification#Variable_length_integer
-    if i<0xfd:
-        return int_to_hex(i)
+    if 0<=i<0xfd:
+        return _HEX_BYTE[i]
+    elif i<0:
+        raise ValueError('var_int: negative value %d' % i)
     elif i<=0xffff:
-        return "fd"+int_to_hex(i,2)
+        return "fd"+bh2u(i.to_bytes(2, 'little'))
     elif i<=0xffffffff:
-        return "fe"+int_to_hex(i,4)
+        return "fe"+bh2u(i.to_bytes(4, 'little'))
     else:
-        return "ff"+int_to_hex(i,8)
+        return "ff"+bh2u(i.to_bytes(8, 'little'))
 
 
 def op_push(i):
-    if i<0x4c:
-        return int_to_hex(i)
+    if 0<=i<0x4c:
+        return _HEX_BYTE[i]
+    elif i<0:
+        raise ValueError('op_push: negative length %d' % i)
     elif i<0xff:
-        return '4c' + int_to_hex(i)
+        return '4c' + _HEX_BYTE[i]
     elif i<0xffff:
-        return '4d' + int_to_hex(i,2)
+        return '4d' + bh2u(i.to_bytes(2, 'little'))
     else:
-        return '4e' + int_to_hex(i,4)
+        return '4e' + bh2u(i.to_bytes(4, 'little'))
 
 def push_script(x):
     return op_push(len(x)//2) + x
 
+# bound once; on OpenSSL builds this is already the C constructor
+_sha256 = hashlib.sha256
+
+
 def sha256(x):
-    x = to_bytes(x, 'utf8')
-    return bytes(hashlib.sha256(x).digest())
+    if type(x) is not bytes:
+        x = to_bytes(x, 'utf8')
+    return _sha256(x).digest()
 
 
 def Hash(x):
-    x = to_bytes(x, 'utf8')
-    out = bytes(sha256(sha256(x)))
-    return out
+    if type(x) is not bytes:
+        x = to_bytes(x, 'utf8')
+    return _sha256(_sha256(x).digest()).digest()
 
 
 def PoWHash(x):
@@ -296,30 +364,31 @@ def i2o_ECPublicKey(pubkey, compressed=False):
     # 0x04 + 32-byte X-coordinate + 32-byte Y-coordinate
     # 0x00 = point at infinity, 0x02 and 0x03 = compressed, 0x04 = uncompressed
     # compressed keys: <sign> <x> where <sign> is 0x02 if y is even and 0x03 if y is odd
-    if compressed:
-        if pubkey.point.y() & 1:
-            key = '03' + '%064x' % pubkey.point.x()
-        else:
-            key = '02' + '%064x' % pubkey.point.x()
-    else:
-        key = '04' + \
-              '%064x' % pubkey.point.x() + \
-              '%064x' % pubkey.point.y()
-
-    return bfh(key)
+    return point_to_ser(pubkey.point, compressed)
 # end pywallet openssl private key implementation
 
 
 ############ functions from pywallet #####################
-def hash_160(public_key):
+# OpenSSL 3 may not provide ripemd160; pick an implementation once
+try:
+    hashlib.new('ripemd160')
+    ripemd160 = lambda x: hashlib.new('ripemd160', x).digest()
+except BaseException:
     try:
-        md = hashlib.new('ripemd160')
-        md.update(sha256(public_key))
-        return md.digest()
+        from Cryptodome.Hash import RIPEMD160
+        ripemd160 = lambda x: RIPEMD160.new(x).digest()
     except BaseException:
         from . import ripemd
-        md = ripemd.new(sha256(public_key))
-        return md.digest()
+        ripemd160 = lambda x: ripemd.new(x).digest()
+
+
+def hash_160(public_key):
+    return _hash_160(to_bytes(public_key, 'utf8'))
+
+
+@lru_cache(maxsize=4096)
+def _hash_160(public_key):
+    return ripemd160(hashlib.sha256(public_key).digest())
 
 
 def hash160_to_b58_address(h160, addrtype):
@@ -362,27 +431,31 @@ def script_to_address(script):
     assert t == TYPE_ADDRESS
     return addr
 
-def address_to_script(addr):
+def address_to_script(addr, net=None):
+    return _address_to_script(addr, net or NetworkConstants.current())
+
+@lru_cache(maxsize=1024)
+def _address_to_script(addr, net):
     addrtype, hash_160 = b58_address_to_hash160(addr)
-    if addrtype == NetworkConstants.ADDRTYPE_P2PKH:
-        script = '76a9'                                      # op_dup, op_hash_160
-        script += push_script(bh2u(hash_160))
-        script += '88ac'                                     # op_equalverify, op_checksig
-    elif addrtype == NetworkConstants.ADDRTYPE_P2SH:
-        script = 'a9'                                        # op_hash_160
-        script += push_script(bh2u(hash_160))
-        script += '87'                                       # op_equal
+    if addrtype == net.ADDRTYPE_P2PKH:
+        script = b'\x76\xa9'                                # op_dup, op_hash_160
+        script += b'\x14' + hash_160                        # push 20 bytes
+        script += b'\x88\xac'                               # op_equalverify, op_checksig
+    elif addrtype == net.ADDRTYPE_P2SH:
+        script = b'\xa9'                                    # op_hash_160
+        script += b'\x14' + hash_160                        # push 20 bytes
+        script += b'\x87'                                   # op_equal
     else:
         raise BaseException('unknown address type')
-    return script
+    return bh2u(script)
 
 def address_to_scripthash(addr):
     script = address_to_script(addr)
     return script_to_scripthash(script)
 
 def script_to_scripthash(script):
-    h = sha256(bytes.fromhex(script))[0:32]
-    return bh2u(bytes(reversed(h)))
+    h = hashlib.sha256(bfh(script)).digest()
+    return bh2u(h[::-1])
 
 def public_key_to_p2pk_script(pubkey):
     script = push_script(pubkey)
@@ -396,6 +469,11 @@ __b43chars = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ$*+-./:'
 assert len(__b43chars) == 43
 
 
+# reverse lookup tables: byte value -> digit, -1 for bytes not in the alphabet
+__b58index = tuple(__b58chars.find(bytes([c])) for c in range(256))
+__b43index = tuple(__b43chars.find(bytes([c])) for c in range(256))
+
+
 def base_encode(v, base):
     """ encode v, which is a string of bytes, to base58."""
     assert_bytes(v)
@@ -403,23 +481,15 @@ def base_encode(v, base):
     chars = __b58chars
     if base == 43:
         chars = __b43chars
-    long_value = 0
-    for (i, c) in enumerate(v[::-1]):
-        long_value += (256**i) * c
+    long_value = int.from_bytes(v, 'big')
     result = bytearray()
     while long_value >= base:
-        div, mod = divmod(long_value, base)
+        long_value, mod = divmod(long_value, base)
         result.append(chars[mod])
-        long_value = div
     result.append(chars[long_value])
     # Bitcoin does a little leading-zero-compression:
     # leading 0-bytes in the input become leading-1s
-    nPad = 0
-    for c in v:
-        if c == 0x00:
-            nPad += 1
-        else:
-            break
+    nPad = len(v) - len(v.lstrip(b'\x00'))
     result.extend([chars[0]] * nPad)
     result.reverse()
     return result.decode('ascii')
@@ -431,28 +501,21 @@ def base_decode(v, length, base):
     v = to_bytes(v, 'ascii')
     assert base in (58, 43)
     chars = __b58chars
+    index = __b58index
     if base == 43:
         chars = __b43chars
+        index = __b43index
     long_value = 0
-    for (i, c) in enumerate(v[::-1]):
-        long_value += chars.find(bytes([c])) * (base**i)
-    result = bytearray()
-    while long_value >= 256:
-        div, mod = divmod(long_value, 256)
-        result.append(mod)
-        long_value = div
-    result.append(long_value)
-    nPad = 0
     for c in v:
-        if c == chars[0]:
-            nPad += 1
-        else:
-            break
-    result.extend(b'\x00' * nPad)
+        long_value = long_value * base + index[c]
+    if long_value < 0:
+        raise ValueError('invalid base%d string' % base)
+    nPad = len(v) - len(v.lstrip(chars[0:1]))
+    n = max(1, (long_value.bit_length() + 7) // 8)
+    result = bytes(nPad) + long_value.to_bytes(n, 'big')
     if length is not None and len(result) != length:
         return None
-    result.reverse()
-    return bytes(result)
+    return result
 
 
 def EncodeBase58Check(vchIn):
@@ -509,7 +572,7 @@ def GetPubKey(pubkey, compressed=False):
 
 
 def GetSecret(pkey):
-    return bfh('%064x' % pkey.secret)
+    return pkey.secret.to_bytes(32, 'big')
 
 
 def is_compressed(sec):
@@ -526,6 +589,7 @@ def address_from_private_key(sec):
     public_key = public_key_from_private_key(privkey, compressed)
     return pubkey_to_address(txin_type, public_key)
 
+@network_cached
 def is_b58_address(addr):
     try:
         addrtype, h = b58_address_to_hash160(addr)
@@ -567,6 +631,19 @@ from ecdsa.curves import SECP256k1
 from ecdsa.ellipticcurve import Point
 from ecdsa.util import string_to_number, number_to_string
 
+from . import secp256k1_comb
+
+# libsecp256k1 bindings; when available, signing, verification and ECDH
+# are done in C instead of through python-ecdsa
+try:
+    import coincurve
+    from coincurve.context import GLOBAL_CONTEXT as _secp256k1_context
+    from coincurve._libsecp256k1 import ffi as _secp256k1_ffi, lib as _secp256k1_lib
+except ImportError:
+    coincurve = None
+    # k*G goes through the python table; pay for it at import time
+    secp256k1_comb.precompute()
+
 
 def msg_magic(message):
     length = bfh(var_int(len(message)))
@@ -574,25 +651,55 @@ def msg_magic(message):
 
 
 def verify_message(address, sig, message):
-    assert_bytes(sig, message)
-    try:
-        h = Hash(msg_magic(message))
-        public_key, compressed = pubkey_from_signature(sig, h)
-        # check public key using the address
-        pubkey = point_to_ser(public_key.pubkey.point, compressed)
-        for txin_type in ['p2pkh']:
-            addr = pubkey_to_address(txin_type, bh2u(pubkey))
-            if address == addr:
-                break
-        else:
-            raise Exception("Bad signature for %s, sig is for %s" % (address,
-                                                                     addr))
-        # check message
-        public_key.verify_digest(sig[1:], h, sigdecode = ecdsa.util.sigdecode_string)
-        return True
-    except Exception as e:
-        print_error("Verification error: {0}".format(e))
-        return False
+    return verify_message_batch([(address, sig, message)])[0]
+
+
+def _secp256k1_recoverer():
+    """Return a pubkey_bytes_from_signature equivalent that calls
+    libsecp256k1 directly, reusing one set of C buffers."""
+    ctx = _secp256k1_context.ctx
+    ffi, lib = _secp256k1_ffi, _secp256k1_lib
+    rsig = ffi.new('secp256k1_ecdsa_recoverable_signature *')
+    pubkey = ffi.new('secp256k1_pubkey *')
+    output = ffi.new('unsigned char[65]')
+    outlen = ffi.new('size_t *')
+
+    def recover(sig, message):
+        recid, compressed = decode_sig_header(sig)
+        if not lib.secp256k1_ecdsa_recoverable_signature_parse_compact(ctx, rsig, sig[1:], recid):
+            raise Exception("Bad signature encoding")
+        if not lib.secp256k1_ecdsa_recover(ctx, pubkey, rsig, Hash(msg_magic(message))):
+            raise Exception("Bad signature")
+        outlen[0] = 65
+        flags = lib.SECP256K1_EC_COMPRESSED if compressed else lib.SECP256K1_EC_UNCOMPRESSED
+        lib.secp256k1_ec_pubkey_serialize(ctx, output, outlen, pubkey, flags)
+        return bytes(ffi.buffer(output, outlen[0]))
+    return recover
+
+
+def verify_message_batch(items):
+    """Verify a list of (address, sig, message) tuples.
+
+    Returns a list of bools, one per item."""
+    recover = _secp256k1_recoverer() if coincurve else pubkey_bytes_from_signature
+    results = []
+    for address, sig, message in items:
+        try:
+            assert_bytes(sig, message)
+            pubkey = recover(sig, message)
+            # check public key using the address
+            for txin_type in ['p2pkh']:
+                addr = pubkey_to_address(txin_type, bh2u(pubkey))
+                if address == addr:
+                    break
+            else:
+                raise Exception("Bad signature for %s, sig is for %s" % (address,
+                                                                         addr))
+            results.append(True)
+        except Exception as e:
+            print_error("Verification error: {0}".format(e))
+            results.append(False)
+    return results
 
 
 def encrypt_message(message, pubkey):
@@ -625,8 +732,8 @@ def negative_point(P):
 
 def point_to_ser(P, comp=True ):
     if comp:
-        return bfh( ('%02x'%(2+(P.y()&1)))+('%064x'%P.x()) )
-    return bfh( '04'+('%064x'%P.x())+('%064x'%P.y()) )
+        return bytes([2 + (P.y() & 1)]) + P.x().to_bytes(32, 'big')
+    return b'\x04' + P.x().to_bytes(32, 'big') + P.y().to_bytes(32, 'big')
 
 
 def ser_to_point(Aser):
@@ -640,35 +747,41 @@ def ser_to_point(Aser):
     return Point( curve, Mx, ECC_YfromX(Mx, curve, Aser[0] == 0x03)[0], _r )
 
 
+def point_from_signature(sig, recid, h):
+    """ See http://www.secg.org/download/aid-780/sec1-v2.pdf, chapter 4.1.6 """
+    from ecdsa import util, numbertheory
+    from . import msqr
+    curveFp = curve_secp256k1
+    G = generator_secp256k1
+    order = G.order()
+    # extract r,s from signature
+    r, s = util.sigdecode_string(sig, order)
+    if not (0 < r < order and 0 < s < order):
+        raise Exception("Bad signature")
+    # 1.1
+    x = r + (recid//2) * order
+    # 1.3
+    alpha = ( x * x * x  + curveFp.a() * x + curveFp.b() ) % curveFp.p()
+    beta = msqr.modular_sqrt(alpha, curveFp.p())
+    y = beta if (beta - recid) % 2 == 0 else curveFp.p() - beta
+    # 1.4 on secp256k1 every point of the curve has order n
+    R = Point(curveFp, x, y)
+    # 1.5 compute e from message:
+    e = string_to_number(h)
+    minus_e = -e % order
+    # 1.6 compute Q = r^-1 (sR - eG)
+    inv_r = numbertheory.inverse_mod(r,order)
+    return multi_mul([(inv_r * s, R), (inv_r * minus_e, G)])
+
+
 class MyVerifyingKey(ecdsa.VerifyingKey):
     @classmethod
     def from_signature(klass, sig, recid, h, curve):
-        """ See http://www.secg.org/download/aid-780/sec1-v2.pdf, chapter 4.1.6 """
-        from ecdsa import util, numbertheory
-        from . import msqr
-        curveFp = curve.curve
-        G = curve.generator
-        order = G.order()
-        # extract r,s from signature
-        r, s = util.sigdecode_string(sig, order)
-        # 1.1
-        x = r + (recid//2) * order
-        # 1.3
-        alpha = ( x * x * x  + curveFp.a() * x + curveFp.b() ) % curveFp.p()
-        beta = msqr.modular_sqrt(alpha, curveFp.p())
-        y = beta if (beta - recid) % 2 == 0 else curveFp.p() - beta
-        # 1.4 the constructor checks that nR is at infinity
-        R = Point(curveFp, x, y, order)
-        # 1.5 compute e from message:
-        e = string_to_number(h)
-        minus_e = -e % order
-        # 1.6 compute Q = r^-1 (sR - eG)
-        inv_r = numbertheory.inverse_mod(r,order)
-        Q = inv_r * ( s * R + minus_e * G )
+        Q = point_from_signature(sig, recid, h)
         return klass.from_public_point( Q, curve )
 
 
-def pubkey_from_signature(sig, h):
+def decode_sig_header(sig):
     if len(sig) != 65:
         raise Exception("Wrong encoding")
     nV = sig[0]
@@ -679,10 +792,157 @@ def pubkey_from_signature(sig, h):
         nV -= 4
     else:
         compressed = False
-    recid = nV - 27
+    return nV - 27, compressed
+
+
+def pubkey_from_signature(sig, h):
+    recid, compressed = decode_sig_header(sig)
     return MyVerifyingKey.from_signature(sig[1:], recid, h, curve = SECP256k1), compressed
 
 
+def pubkey_bytes_from_signature(sig, message):
+    """Recover the serialized public key of a message signature.
+
+    Raises if the signature is not valid for the recovered key."""
+    recid, compressed = decode_sig_header(sig)
+    # a successful recovery implies the signature verifies
+    # against the recovered key
+    if coincurve:
+        public_key = coincurve.PublicKey.from_signature_and_message(
+            sig[1:] + bytes([recid]), msg_magic(message), hasher=Hash)
+        return public_key.format(compressed)
+    Q = point_from_signature(sig[1:], recid, Hash(msg_magic(message)))
+    if Q == ecdsa.ellipticcurve.INFINITY:
+        raise Exception("Bad signature")
+    return point_to_ser(Q, compressed)
+
+
+def point_from_secret(secret):
+    """Return secret*G as a python-ecdsa Point."""
+    if coincurve:
+        order = generator_secp256k1.order()
+        x, y = coincurve.PrivateKey((secret % order).to_bytes(32, 'big')).public_key.point()
+        return Point(curve_secp256k1, x, y)
+    P = secp256k1_comb.scalar_base_mul(secret)
+    if P is None:
+        return ecdsa.ellipticcurve.INFINITY
+    return Point(curve_secp256k1, P[0], P[1])
+
+
+def _wnaf(k, w=5):
+    """Width-w NAF of k, least significant digit first."""
+    digits = []
+    while k:
+        if k & 1:
+            d = k & ((1 << w) - 1)
+            if d >= 1 << (w - 1):
+                d -= 1 << w
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+# secp256k1 endomorphism: (x, y) -> (BETA*x, y) multiplies points by LAMBDA
+BETA = 0x7ae96a2b657c07106e64479eac3434e99cf0497512f58995c1396c28719501ee
+LAMBDA = 0x5363ad4cc05c30e0a5261c028812645a122e22ea20816678df02967c1b23bd72
+# short basis of the lattice {(a, b): a + b*LAMBDA = 0 mod n}
+_GLV_A1 = 0x3086d221a7d46bcde86c90e49284eb15
+_GLV_B1 = -0xe4437ed6010e88286f547fa90abfe4c3
+_GLV_A2 = 0x114ca50f7a8e2f3f657c1108d9d44cfd8
+_GLV_B2 = _GLV_A1
+
+
+def glv_split(k):
+    """Return (k1, k2), about 128 bits each, with k1 + k2*LAMBDA = k mod n."""
+    n = generator_secp256k1.order()
+    c1 = (2 * _GLV_B2 * k + n) // (2 * n)
+    c2 = (-2 * _GLV_B1 * k + n) // (2 * n)
+    k1 = k - c1 * _GLV_A1 - c2 * _GLV_A2
+    k2 = -c1 * _GLV_B1 - c2 * _GLV_B2
+    return k1, k2
+
+
+def _odd_multiples(P):
+    """Affine P, 3P, ..., 15P for the affine point P."""
+    J = secp256k1_comb.to_jacobian(P)
+    twice = secp256k1_comb.from_jacobian(secp256k1_comb.jacobian_double(J))
+    Js = [J]
+    for i in range(7):
+        J = secp256k1_comb.jacobian_add_affine(J, twice)
+        Js.append(J)
+    return secp256k1_comb.batch_from_jacobian(Js)
+
+
+def multi_mul(pairs):
+    """Return the sum of k*P over (k, P) pairs of python-ecdsa Points.
+
+    Each scalar is split with the endomorphism, and all the resulting
+    half-length wNAFs are interleaved over a single doubling chain."""
+    _p = curve_secp256k1.p()
+    n = generator_secp256k1.order()
+    tables = []
+    nafs = []
+    for k, P in pairs:
+        k %= n
+        if k == 0 or P == ecdsa.ellipticcurve.INFINITY:
+            continue
+        odd = _odd_multiples((P.x(), P.y()))
+        # phi(jP) = (BETA*x, y) for every multiple jP
+        odd_phi = [(BETA * x % _p, y) for x, y in odd]
+        for ki, table in zip(glv_split(k), [odd, odd_phi]):
+            if ki < 0:
+                ki, table = -ki, [(x, _p - y) for x, y in table]
+            if ki:
+                tables.append(table)
+                nafs.append(_wnaf(ki))
+    J = secp256k1_comb.to_jacobian(None)
+    for i in reversed(range(max(map(len, nafs), default=0))):
+        J = secp256k1_comb.jacobian_double(J)
+        for odd, naf in zip(tables, nafs):
+            d = naf[i] if i < len(naf) else 0
+            if d > 0:
+                J = secp256k1_comb.jacobian_add_affine(J, odd[d >> 1])
+            elif d < 0:
+                x, y = odd[-d >> 1]
+                J = secp256k1_comb.jacobian_add_affine(J, (x, _p - y))
+    R = secp256k1_comb.from_jacobian(J)
+    if R is None:
+        return ecdsa.ellipticcurve.INFINITY
+    return Point(curve_secp256k1, R[0], R[1])
+
+
+def point_mul(P, k):
+    """Return k*P for a python-ecdsa Point."""
+    return multi_mul([(k, P)])
+
+
+class InvalidECPointException(Exception):
+    """Serialized public key that is not a point on secp256k1."""
+
+
+def get_ecdh_key(pubkey, secret):
+    """Return the serialized shared point secret*pubkey (compressed)."""
+    # secret may be wider than the group order (storage keys are 512-bit
+    # PBKDF2 outputs); only its residue mod n matters
+    secret %= generator_secp256k1.order()
+    if coincurve:
+        try:
+            pk = coincurve.PublicKey(pubkey)
+        except ValueError:
+            raise InvalidECPointException('invalid pubkey')
+        return pk.multiply(secret.to_bytes(32, 'big')).format(True)
+    try:
+        pk = ser_to_point(pubkey)
+    except Exception:
+        raise InvalidECPointException('invalid pubkey')
+    if not ecdsa.ecdsa.point_is_valid(generator_secp256k1, pk.x(), pk.y()):
+        raise InvalidECPointException('invalid pubkey')
+    return point_to_ser(point_mul(pk, secret))
+
+
 class MySigningKey(ecdsa.SigningKey):
     """Enforce low S values in signatures"""
 
@@ -699,8 +959,8 @@ class MySigningKey(ecdsa.SigningKey):
 class EC_KEY(object):
 
     def __init__( self, k ):
-        secret = string_to_number(k)
-        self.pubkey = ecdsa.ecdsa.Public_key( generator_secp256k1, generator_secp256k1 * secret )
+        secret = int.from_bytes(k, 'big')
+        self.pubkey = ecdsa.ecdsa.Public_key( generator_secp256k1, point_from_secret(secret) )
         self.privkey = ecdsa.ecdsa.Private_key( self.pubkey, secret )
         self.secret = secret
 
@@ -716,6 +976,14 @@ class EC_KEY(object):
 
     def sign_message(self, message, is_compressed):
         message = to_bytes(message, 'utf8')
+        if coincurve:
+            secret = self.secret % generator_secp256k1.order()
+            privkey = coincurve.PrivateKey(secret.to_bytes(32, 'big'))
+            signature = privkey.sign_recoverable(msg_magic(message), hasher=Hash)
+            recid = signature[64]
+            sig = bytes([27 + recid + (4 if is_compressed else 0)]) + signature[0:64]
+            self.verify_message(sig, message)
+            return sig
         signature = self.sign(Hash(msg_magic(message)))
         for i in range(4):
             sig = bytes([27 + i + (4 if is_compressed else 0)]) + signature
@@ -729,13 +997,10 @@ class EC_KEY(object):
 
     def verify_message(self, sig, message):
         assert_bytes(message)
-        h = Hash(msg_magic(message))
-        public_key, compressed = pubkey_from_signature(sig, h)
-        # check public key
-        if point_to_ser(public_key.pubkey.point, compressed) != point_to_ser(self.pubkey.point, compressed):
+        _, compressed = decode_sig_header(sig)
+        # check public key and message
+        if pubkey_bytes_from_signature(sig, message) != point_to_ser(self.pubkey.point, compressed):
             raise Exception("Bad signature")
-        # check message
-        public_key.verify_digest(sig[1:], h, sigdecode = ecdsa.util.sigdecode_string)
 
 
     # ECIES encryption/decryption methods; AES-128-CBC with PKCS7 is used as the cipher; hmac-sha256 is used as the mac
@@ -744,13 +1009,9 @@ class EC_KEY(object):
     def encrypt_message(self, message, pubkey):
         assert_bytes(message)
 
-        pk = ser_to_point(pubkey)
-        if not ecdsa.ecdsa.point_is_valid(generator_secp256k1, pk.x(), pk.y()):
-            raise Exception('invalid pubkey')
-
-        ephemeral_exponent = number_to_string(ecdsa.util.randrange(pow(2,256)), generator_secp256k1.order())
+        ephemeral_exponent = (ecdsa.util.randrange(pow(2,256)) % generator_secp256k1.order()).to_bytes(32, 'big')
         ephemeral = EC_KEY(ephemeral_exponent)
-        ecdh_key = point_to_ser(pk * ephemeral.privkey.secret_multiplier)
+        ecdh_key = get_ecdh_key(pubkey, ephemeral.privkey.secret_multiplier)
         key = hashlib.sha512(ecdh_key).digest()
         iv, key_e, key_m = key[0:16], key[16:32], key[32:]
         ciphertext = aes_encrypt_with_iv(key_e, iv, message)
@@ -771,12 +1032,9 @@ class EC_KEY(object):
         if magic != b'BIE1':
             raise Exception('invalid ciphertext: invalid magic bytes')
         try:
-            ephemeral_pubkey = ser_to_point(ephemeral_pubkey)
-        except AssertionError as e:
-            raise Exception('invalid ciphertext: invalid ephemeral pubkey')
-        if not ecdsa.ecdsa.point_is_valid(generator_secp256k1, ephemeral_pubkey.x(), ephemeral_pubkey.y()):
+            ecdh_key = get_ecdh_key(ephemeral_pubkey, self.privkey.secret_multiplier)
+        except InvalidECPointException:
             raise Exception('invalid ciphertext: invalid ephemeral pubkey')
-        ecdh_key = point_to_ser(ephemeral_pubkey * self.privkey.secret_multiplier)
         key = hashlib.sha512(ecdh_key).digest()
         iv, key_e, key_m = key[0:16], key[16:32], key[32:]
         if mac != hmac.new(key_m, encrypted[:-32], hashlib.sha256).digest():
@@ -790,12 +1048,26 @@ random_seed = lambda n: "%032x"%ecdsa.util.randrange( pow(2,n) )
 BIP32_PRIME = 0x80000000
 
 
+@lru_cache(maxsize=64)
+def _keyed_hmac_sha512(key):
+    return hmac.new(key, digestmod=hashlib.sha512)
+
+
+def bip32_hmac(key, data):
+    """HMAC-SHA512 of data, keyed with a chain code.
+
+    Wallets derive many children from the same parent, so the keyed
+    state is cached and copied instead of hashing the padded key again."""
+    mac = _keyed_hmac_sha512(key).copy()
+    mac.update(data)
+    return mac.digest()
+
+
 def get_pubkeys_from_secret(secret):
     # public key
-    private_key = ecdsa.SigningKey.from_string( secret, curve = SECP256k1 )
-    public_key = private_key.get_verifying_key()
-    K = public_key.to_string()
-    K_compressed = GetPubKey(public_key.pubkey,True)
+    point = point_from_secret(int.from_bytes(secret, 'big'))
+    K = point_to_ser(point, False)[1:]
+    K_compressed = point_to_ser(point, True)
     return K, K_compressed
 
 
@@ -809,7 +1081,7 @@ def get_pubkeys_from_secret(secret):
 #  public key can be determined without the master private key.
 def CKD_priv(k, c, n):
     is_prime = n & BIP32_PRIME
-    return _CKD_priv(k, c, bfh(rev_hex(int_to_hex(n,4))), is_prime)
+    return _CKD_priv(k, c, n.to_bytes(4, 'big'), is_prime)
 
 
 def _CKD_priv(k, c, s, is_prime):
@@ -817,8 +1089,8 @@ def _CKD_priv(k, c, s, is_prime):
     keypair = EC_KEY(k)
     cK = GetPubKey(keypair.pubkey,True)
     data = bytes([0]) + k + s if is_prime else cK + s
-    I = hmac.new(c, data, hashlib.sha512).digest()
-    k_n = number_to_string( (string_to_number(I[0:32]) + string_to_number(k)) % order , order )
+    I = bip32_hmac(c, data)
+    k_n = ((int.from_bytes(I[0:32], 'big') + int.from_bytes(k, 'big')) % order).to_bytes(32, 'big')
     c_n = I[32:]
     return k_n, c_n
 
@@ -830,14 +1102,13 @@ def _CKD_priv(k, c, s, is_prime):
 #  non-negative. If n is negative, we need the master private key to find it.
 def CKD_pub(cK, c, n):
     if n & BIP32_PRIME: raise
-    return _CKD_pub(cK, c, bfh(rev_hex(int_to_hex(n,4))))
+    return _CKD_pub(cK, c, n.to_bytes(4, 'big'))
 
 # helper function, callable with arbitrary string
 def _CKD_pub(cK, c, s):
     order = generator_secp256k1.order()
-    I = hmac.new(c, cK + s, hashlib.sha512).digest()
-    curve = SECP256k1
-    pubkey_point = string_to_number(I[0:32])*curve.generator + ser_to_point(cK)
+    I = bip32_hmac(c, cK + s)
+    pubkey_point = point_from_secret(int.from_bytes(I[0:32], 'big')) + ser_to_point(cK)
     public_key = ecdsa.VerifyingKey.from_public_point( pubkey_point, curve = SECP256k1 )
     c_n = I[32:]
     cK_n = GetPubKey(public_key.pubkey,True)
@@ -845,11 +1116,11 @@ def _CKD_pub(cK, c, s):
 
 
 def xprv_header(xtype):
-    return bfh("%08x" % XPRV_HEADERS[xtype])
+    return XPRV_HEADERS[xtype].to_bytes(4, 'big')
 
 
 def xpub_header(xtype):
-    return bfh("%08x" % XPUB_HEADERS[xtype])
+    return XPUB_HEADERS[xtype].to_bytes(4, 'big')
 
 
 def serialize_xprv(xtype, c, k, depth=0, fingerprint=b'\x00'*4, child_number=b'\x00'*4):
@@ -870,7 +1141,7 @@ def deserialize_xkey(xkey, prv):
     fingerprint = xkey[5:9]
     child_number = xkey[9:13]
     c = xkey[13:13+32]
-    header = int('0x' + bh2u(xkey[0:4]), 16)
+    header = int.from_bytes(xkey[0:4], 'big')
     headers = XPRV_HEADERS if prv else XPUB_HEADERS
     if header not in headers.values():
         raise BaseException('Invalid xpub format', hex(header))
@@ -887,7 +1158,7 @@ def deserialize_drk(xkey, prv):
     fingerprint = xkey[5:9]
     child_number = xkey[9:13]
     c = xkey[13:13+32]
-    header = int('0x' + bh2u(xkey[0:4]), 16)
+    header = int.from_bytes(xkey[0:4], 'big')
     if prv and header != NetworkConstants.DRKV_HEADER:
         raise BaseException('Invalid drkv format', hex(header))
     if not prv and header != NetworkConstants.DRKP_HEADER:
@@ -897,12 +1168,14 @@ def deserialize_drk(xkey, prv):
     K_or_k = xkey[13+n:]
     return xtype, depth, fingerprint, child_number, c, K_or_k
 
+@network_cached
 def deserialize_xpub(xkey):
     return deserialize_xkey(xkey, False)
 
 def deserialize_xprv(xkey):
     return deserialize_xkey(xkey, True)
 
+@network_cached
 def deserialize_drkp(xkey):
     return deserialize_drk(xkey, False)
 
@@ -913,6 +1186,7 @@ def xpub_type(x):
     return deserialize_xpub(x)[0]
 
 
+@network_cached
 def is_xpub(text):
     try:
         deserialize_xpub(text)
@@ -952,7 +1226,7 @@ def xpub_from_xprv(xprv):
 
 
 def bip32_root(seed, xtype):
-    I = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    I = bip32_hmac(b"Bitcoin seed", seed)
     master_k = I[0:32]
     master_c = I[32:]
     K, cK = get_pubkeys_from_secret(master_k)
@@ -974,12 +1248,12 @@ def bip32_derivation(s):
         i = int(n[:-1]) + BIP32_PRIME if n[-1] == "'" else int(n)
         yield i
 
+# 'm/' followed by '/'-separated indexes, hardened ones suffixed with "'";
+# empty segments are skipped by bip32_derivation, so they are allowed here
+_BIP32_RE = re.compile(r"m/(?:\d+'?)?(?:/(?:\d+'?)?)*\Z")
+
 def is_bip32_derivation(x):
-    try:
-        [ i for i in bip32_derivation(x)]
-        return True
-    except :
-        return False
+    return isinstance(x, str) and _BIP32_RE.match(x) is not None
 
 def bip32_private_derivation(xprv, branch, sequence):
     assert sequence.startswith(branch)
@@ -995,7 +1269,7 @@ def bip32_private_derivation(xprv, branch, sequence):
         depth += 1
     _, parent_cK = get_pubkeys_from_secret(parent_k)
     fingerprint = hash_160(parent_cK)[0:4]
-    child_number = bfh("%08X"%i)
+    child_number = i.to_bytes(4, 'big')
     K, cK = get_pubkeys_from_secret(k)
     xpub = serialize_xpub(xtype, c, cK, depth, fingerprint, child_number)
     xprv = serialize_xprv(xtype, c, k, depth, fingerprint, child_number)
@@ -1013,7 +1287,7 @@ def bip32_public_derivation(xpub, branch, sequence):
         cK, c = CKD_pub(cK, c, i)
         depth += 1
     fingerprint = hash_160(parent_cK)[0:4]
-    child_number = bfh("%08X"%i)
+    child_number = i.to_bytes(4, 'big')
     return serialize_xpub(xtype, c, cK, depth, fingerprint, child_number)
 
 
@@ -0,0 +1,131 @@
+"""Fixed-base scalar multiplication on secp256k1.
+
+Pure python fallback used when libsecp256k1 is not available.
+Multiples of the generator are read from a precomputed table:
+row i holds d*16^i*G for d in 1..15, so k*G is the sum of one
+table entry per nibble of k, and no doublings are needed.
+Points are (x, y) tuples of ints; None is the point at infinity.
+"""
+
+_p = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+_n = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+_Gx = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+_Gy = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+
+COMB_W = 4                        # bits per table row
+COMB_D = 256 // COMB_W            # number of table rows
+
+_table = None
+
+
+def _inv(a):
+    return pow(a, _p - 2, _p)
+
+
+def to_jacobian(P):
+    if P is None:
+        return (1, 1, 0)
+    return (P[0], P[1], 1)
+
+
+def from_jacobian(J):
+    X, Y, Z = J
+    if Z == 0:
+        return None
+    zinv = _inv(Z)
+    zinv2 = zinv * zinv % _p
+    return (X * zinv2 % _p, Y * zinv2 * zinv % _p)
+
+
+def batch_from_jacobian(Js):
+    """Convert finite jacobian points to affine with a single inversion."""
+    prods = []
+    acc = 1
+    for X, Y, Z in Js:
+        acc = acc * Z % _p
+        prods.append(acc)
+    inv = _inv(acc)
+    out = [None] * len(Js)
+    for i in reversed(range(len(Js))):
+        X, Y, Z = Js[i]
+        zinv = inv * prods[i - 1] % _p if i else inv
+        inv = inv * Z % _p
+        zinv2 = zinv * zinv % _p
+        out[i] = (X * zinv2 % _p, Y * zinv2 * zinv % _p)
+    return out
+
+
+def jacobian_double(J):
+    X, Y, Z = J
+    if Y == 0 or Z == 0:
+        return (1, 1, 0)
+    YY = Y * Y % _p
+    S = 4 * X * YY % _p
+    M = 3 * X * X % _p
+    X3 = (M * M - 2 * S) % _p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % _p
+    Z3 = 2 * Y * Z % _p
+    return (X3, Y3, Z3)
+
+
+def jacobian_add_affine(J, P):
+    """Add the affine point P to the jacobian point J."""
+    if P is None:
+        return J
+    X1, Y1, Z1 = J
+    if Z1 == 0:
+        return to_jacobian(P)
+    x2, y2 = P
+    Z1Z1 = Z1 * Z1 % _p
+    H = (x2 * Z1Z1 - X1) % _p
+    r = (y2 * Z1 * Z1Z1 - Y1) % _p
+    if H == 0:
+        if r == 0:
+            return jacobian_double(J)
+        return (1, 1, 0)
+    HH = H * H % _p
+    HHH = H * HH % _p
+    V = X1 * HH % _p
+    X3 = (r * r - HHH - 2 * V) % _p
+    Y3 = (r * (V - X3) - Y1 * HHH) % _p
+    Z3 = Z1 * H % _p
+    return (X3, Y3, Z3)
+
+
+def _build_table():
+    table = []
+    base = (_Gx, _Gy)
+    for i in range(COMB_D):
+        # base, 2*base, ..., 16*base; the last one is the next row's base
+        J = to_jacobian(base)
+        Js = [J]
+        for d in range(2, (1 << COMB_W) + 1):
+            J = jacobian_add_affine(J, base)
+            Js.append(J)
+        row = batch_from_jacobian(Js)
+        base = row.pop()
+        table.append(row)
+    return table
+
+
+def precompute():
+    """Build the table now rather than on the first multiplication."""
+    global _table
+    if _table is None:
+        _table = _build_table()
+
+
+def scalar_base_mul(k):
+    """Return k*G as an affine (x, y) tuple, or None for infinity."""
+    precompute()
+    k %= _n
+    mask = (1 << COMB_W) - 1
+    J = (1, 1, 0)
+    for row in _table:
+        d = k & mask
+        if d:
+            J = jacobian_add_affine(J, row[d - 1])
+        k >>= COMB_W
+        if not k:
+            break
+    return from_jacobian(J)
@@ -29,11 +29,11 @@ import json
 import copy
 import re
 import stat
-import pbkdf2, hmac, hashlib
+import hashlib
 import base64
 import zlib
 
-from .util import PrintError, profiler
+from .util import PrintError, profiler, to_bytes
 from .plugins import run_hook, plugin_loaders
 from .keystore import bip44_derivation
 from . import bitcoin
@@ -116,7 +116,7 @@ class WalletStorage(PrintError):
         return self.path and os.path.exists(self.path)
 
     def get_key(self, password):
-        secret = pbkdf2.PBKDF2(password, '', iterations = 1024, macmodule = hmac, digestmodule = hashlib.sha512).read(64)
+        secret = hashlib.pbkdf2_hmac('sha512', to_bytes(password, 'utf8'), b'', iterations = 1024)
         ec_key = bitcoin.EC_KEY(secret)
         return ec_key
 
@@ -1,4 +1,5 @@
 import base64
+import os
 import unittest
 import sys
 from ecdsa.util import number_to_string
@@ -9,10 +10,11 @@ from lib.bitcoin import (
     pw_decode, Hash, public_key_from_private_key, address_from_private_key,
     is_address, is_private_key, xpub_from_xprv, is_new_seed, is_old_seed,
     var_int, op_push, address_to_script, regenerate_key,
-    verify_message, deserialize_privkey, serialize_privkey,
+    verify_message, verify_message_batch, point_mul, glv_split, LAMBDA, deserialize_privkey, serialize_privkey,
     is_b58_address, address_to_scripthash, is_minikey, is_compressed, is_xpub,
     xpub_type, is_xprv, is_bip32_derivation, seed_type, NetworkConstants,
     deserialize_xprv, deserialize_xpub, deserialize_drkv, deserialize_drkp)
+from lib.secp256k1_comb import scalar_base_mul
 from lib.util import bfh, bh2u
 from lib.keystore import from_master_key
 
@@ -31,7 +33,7 @@ class Test_bitcoin(unittest.TestCase):
     def _do_test_crypto(self, message):
         G = generator_secp256k1
         _r  = G.order()
-        pvk = ecdsa.util.randrange( pow(2,256) ) %_r
+        pvk = int.from_bytes(os.urandom(32), 'big') % _r
 
         Pub = pvk*G
         pubkey_c = point_to_ser(Pub,True)
@@ -55,6 +57,30 @@ class Test_bitcoin(unittest.TestCase):
         #print signature
         EC_KEY.verify_message(eck, signature, message)
 
+    def test_scalar_base_mul(self):
+        G = generator_secp256k1
+        _r = G.order()
+        for k in [1, 2, 15, 16, 0x1234567890abcdef, _r - 1, ecdsa.util.randrange(_r)]:
+            P = k*G
+            self.assertEqual((P.x(), P.y()), scalar_base_mul(k))
+        self.assertIsNone(scalar_base_mul(_r))
+
+    def test_point_mul(self):
+        G = generator_secp256k1
+        _r = G.order()
+        P = ecdsa.util.randrange(_r) * G
+        for k in [1, 2, 15, 16, 31, 0x1234567890abcdef, _r - 1, ecdsa.util.randrange(_r)]:
+            self.assertEqual(k*P, point_mul(P, k))
+        self.assertEqual(ecdsa.ellipticcurve.INFINITY, point_mul(P, _r))
+
+    def test_glv_split(self):
+        _r = generator_secp256k1.order()
+        for k in [0, 1, LAMBDA, _r - 1, ecdsa.util.randrange(_r)]:
+            k1, k2 = glv_split(k)
+            self.assertEqual(k, (k1 + k2 * LAMBDA) % _r)
+            self.assertLess(abs(k1), 2**129)
+            self.assertLess(abs(k2), 2**129)
+
     def test_msg_signing(self):
         msg1 = b'Chancellor on brink of second bailout for banks'
         msg2 = b'Electrum'
@@ -83,6 +109,10 @@ class Test_bitcoin(unittest.TestCase):
         self.assertFalse(verify_message(addr1, b'wrong', msg1))
         self.assertFalse(verify_message(addr1, sig2, msg1))
 
+        self.assertEqual([True, True, False, False], verify_message_batch([
+            (addr1, sig1, msg1), (addr2, sig2, msg2),
+            (addr1, b'wrong', msg1), (addr1, sig2, msg1)]))
+
     def test_aes_homomorphic(self):
         """Make sure AES is homomorphic."""
         payload = u'\u66f4\u7a33\u5b9a\u7684\u4ea4\u6613\u5e73\u53f0'
@@ -133,6 +163,8 @@ class Test_bitcoin(unittest.TestCase):
         self.assertEqual(var_int(0xffffffff), "feffffffff")
         self.assertEqual(var_int(0x100000000), "ff0000000001000000")
         self.assertEqual(var_int(0x0123456789abcdef), "ffefcdab8967452301")
+        with self.assertRaises(ValueError):
+            var_int(-1)
 
     def test_op_push(self):
         self.assertEqual(op_push(0x00), '00')
@@ -147,6 +179,8 @@ class Test_bitcoin(unittest.TestCase):
         self.assertEqual(op_push(0xffff), '4effff0000')
         self.assertEqual(op_push(0x10000), '4e00000100')
         self.assertEqual(op_push(0x12345678), '4e78563412')
+        with self.assertRaises(ValueError):
+            op_push(-1)
 
     def test_address_to_script(self):
         # base58 P2PKH
@@ -157,6 +191,12 @@ class Test_bitcoin(unittest.TestCase):
         self.assertEqual(address_to_script('bVFFc3ivKkH53swKo76aS8qggzFkrA5Ty6'), 'a914b52d95009d90c4485dddde8317bf31b035c5131c87')
         self.assertEqual(address_to_script('bGTSofKbsw1AtZWQAS3VMGM4mk1biTiZ9n'), 'a91428e249b28416bf909d7b52537b4f8785c9fb505b87')
 
+        # explicit network
+        net = NetworkConstants.current()
+        self.assertEqual(address_to_script('GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb', net), '76a914a1b18ac00db95bcc53b9fdf1dbaa97f1fe7e305588ac')
+        with self.assertRaises(BaseException):
+            address_to_script('GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb', net._replace(ADDRTYPE_P2PKH=111))
+
 
 """class Test_bitcoin_testnet(unittest.TestCase):
 
@@ -189,6 +229,16 @@ class Test_xprv_xpub(unittest.TestCase):
          'xtype': 'standard'},
     )
 
+    bip32_vectors = (
+        # see https://en.bitcoin.it/wiki/BIP_0032_TestVectors
+        ("000102030405060708090a0b0c0d0e0f", "m/0'/1/2'/2/1000000000",
+         "ToEA6qpu6F7tMbkhs81LYpv1AE65hGb34J2DRjTXZ9gS22UVDP3KTZrBmjkFJsESg8gkUSvb21c1aR6y14XQCjmKWrFmzrkMhANJqxP3GenZSJd",
+         "TDt9EhvBdbUrYWbp2eF1KfsTK4rurMJUCjbzWQP8XSvaNBkX742fkg2aqZ4dFiEp9247o7jVxwxhfyuAoTeTfWEPrVZNz9QyhECgRQhVo1R47Ej"),
+        ("fffcf9f6f3f0edeae7e4e1dedbd8d5d2cfccc9c6c3c0bdbab7b4b1aeaba8a5a29f9c999693908d8a8784817e7b7875726f6c696663605d5a5754514e4b484542", "m/0/2147483647'/1/2147483646'/2",
+         "ToEA6pbmLqZm2HRPEfBMk1WvRni6r6JaJ8ULZkJXQvi1tnNwm7FRri38ihYcL9ouBqx3B4USTRPzS7oDbgSJ6FiXdcKhKD5TPNe5wVGtC3N27Jk",
+         "TDt9Egh3tBvjDCGVQBR2WrUNadUw1B21Sa47eRE8PDxAEweyenEn9pDXnWrzH1Rz9YfZu6M3ZGRz2wLcJrJgCHywi1U5y2fVuer31Dcf4Mqgck3"),
+    )
+
     def _do_test_bip32(self, seed, sequence):
         xprv, xpub = bip32_root(bfh(seed), 'standard')
         self.assertEqual("m/", sequence[0:2])
@@ -196,24 +246,22 @@ class Test_xprv_xpub(unittest.TestCase):
         sequence = sequence[2:]
         for n in sequence.split('/'):
             child_path = path + '/' + n
-            if n[-1] != "'":
-                xpub2 = bip32_public_derivation(xpub, path, child_path)
-            xprv, xpub = bip32_private_derivation(xprv, path, child_path)
-            if n[-1] != "'":
-                self.assertEqual(xpub, xpub2)
+            with self.subTest(path=child_path):
+                if n[-1] != "'":
+                    xpub2 = bip32_public_derivation(xpub, path, child_path)
+                xprv, xpub = bip32_private_derivation(xprv, path, child_path)
+                if n[-1] != "'":
+                    self.assertEqual(xpub, xpub2)
             path = child_path
 
         return xpub, xprv
 
     def test_bip32(self):
-        # see https://en.bitcoin.it/wiki/BIP_0032_TestVectors
-        xpub, xprv = self._do_test_bip32("000102030405060708090a0b0c0d0e0f", "m/0'/1/2'/2/1000000000")
-        self.assertEqual("ToEA6qpu6F7tMbkhs81LYpv1AE65hGb34J2DRjTXZ9gS22UVDP3KTZrBmjkFJsESg8gkUSvb21c1aR6y14XQCjmKWrFmzrkMhANJqxP3GenZSJd", xpub)
-        self.assertEqual("TDt9EhvBdbUrYWbp2eF1KfsTK4rurMJUCjbzWQP8XSvaNBkX742fkg2aqZ4dFiEp9247o7jVxwxhfyuAoTeTfWEPrVZNz9QyhECgRQhVo1R47Ej", xprv)
-
-        xpub, xprv = self._do_test_bip32("fffcf9f6f3f0edeae7e4e1dedbd8d5d2cfccc9c6c3c0bdbab7b4b1aeaba8a5a29f9c999693908d8a8784817e7b7875726f6c696663605d5a5754514e4b484542","m/0/2147483647'/1/2147483646'/2")
-        self.assertEqual("ToEA6pbmLqZm2HRPEfBMk1WvRni6r6JaJ8ULZkJXQvi1tnNwm7FRri38ihYcL9ouBqx3B4USTRPzS7oDbgSJ6FiXdcKhKD5TPNe5wVGtC3N27Jk", xpub)
-        self.assertEqual("TDt9Egh3tBvjDCGVQBR2WrUNadUw1B21Sa47eRE8PDxAEweyenEn9pDXnWrzH1Rz9YfZu6M3ZGRz2wLcJrJgCHywi1U5y2fVuer31Dcf4Mqgck3", xprv)
+        for seed, sequence, expected_xpub, expected_xprv in self.bip32_vectors:
+            with self.subTest(sequence=sequence):
+                xpub, xprv = self._do_test_bip32(seed, sequence)
+                self.assertEqual(expected_xpub, xpub)
+                self.assertEqual(expected_xprv, xprv)
 
     def test_xpub_from_xprv(self):
         """We can derive the xpub key from a xprv."""
@@ -291,6 +339,15 @@ class Test_drk_import(unittest.TestCase):
     def test_deserialize_drkv(self):
         self.check_deserialized(deserialize_drkv(self.drkv), True)
 
+    def test_deserialize_drkp_follows_network(self):
+        self.check_deserialized(deserialize_drkp(self.drkp), False)
+        NetworkConstants.set_testnet()
+        try:
+            self.assertRaises(BaseException, deserialize_drkp, self.drkp)
+        finally:
+            NetworkConstants.set_mainnet()
+        self.check_deserialized(deserialize_drkp(self.drkp), False)
+
     def test_keystore_from_xpub(self):
         keystore = from_master_key(self.xpub)
         self.assertEqual(keystore.xpub, self.xpub)
@@ -335,18 +392,22 @@ class Test_keyImport(unittest.TestCase):
          
     )
 
+    @classmethod
+    def setUpClass(cls):
+        cls._privs = tuple(d['priv'] for d in cls.priv_pub_addr)
+        cls._addrs = tuple(d['address'] for d in cls.priv_pub_addr)
+        cls._keys = tuple(deserialize_privkey(priv) for priv in cls._privs)
+
     def test_public_key_from_private_key(self):
-        for priv_details in self.priv_pub_addr:
-            txin_type, privkey, compressed = deserialize_privkey(priv_details['priv'])
+        for priv_details, (txin_type, privkey, compressed) in zip(self.priv_pub_addr, self._keys):
             result = public_key_from_private_key(privkey, compressed)
             self.assertEqual(priv_details['pub'], result)
             self.assertEqual(priv_details['txin_type'], txin_type)
             self.assertEqual(priv_details['compressed'], compressed)
 
     def test_address_from_private_key(self):
-        for priv_details in self.priv_pub_addr:
-            addr2 = address_from_private_key(priv_details['priv'])
-            self.assertEqual(priv_details['address'], addr2)
+        for priv, addr in zip(self._privs, self._addrs):
+            self.assertEqual(addr, address_from_private_key(priv))
 
     def test_is_valid_address(self):
         for priv_details in self.priv_pub_addr:
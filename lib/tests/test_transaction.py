@@ -1,15 +1,20 @@
+import copy
 import unittest
 from lib import transaction
 from lib.bitcoin import TYPE_ADDRESS
 
 from lib.keystore import xpubkey_to_address
 
-from lib.util import bh2u
+from lib.util import bfh, bh2u
 
 unsigned_blob = '010000004bf3205b01907c356362e7c111414eb4183da38916875f174c98da01c9737f136833f74e8e01000000494830450221009f79034227686ccea3cc96fa36260e8525dc14ce9f6f9c457d9058de44e34bac02205b06b0411747f49677c4aca1b9b26325966a66f90878d8c0db1a967383207b7801ffffffff020000000000000000006fbc61380c0b010023210299f7dd97f2ca1d2e7ae0df3b1c88205532cab812f2b632c1ecfd9015dc24ea30ac00000000'
 signed_blob = '010000004bf3205b01907c356362e7c111414eb4183da38916875f174c98da01c9737f136833f74e8e01000000494830450221009f79034227686ccea3cc96fa36260e8525dc14ce9f6f9c457d9058de44e34bac02205b06b0411747f49677c4aca1b9b26325966a66f90878d8c0db1a967383207b7801ffffffff020000000000000000006fbc61380c0b010023210299f7dd97f2ca1d2e7ae0df3b1c88205532cab812f2b632c1ecfd9015dc24ea30ac00000000'
 v2_blob = "0200000001191601a44a81e061502b7bfbc6eaa1cef6d1e6af5308ef96c9342f71dbf4b9b5000000006b483045022100a6d44d0a651790a477e75334adfb8aae94d6612d01187b2c02526e340a7fd6c8022028bdf7a64a54906b13b145cd5dab21a26bd4b85d6044e9b97bceab5be44c2a9201210253e8e0254b0c95776786e40984c1aa32a7d03efa6bdacdea5f421b774917d346feffffff026b20fa04000000001976a914024db2e87dd7cfd0e5f266c5f212e21a31d805a588aca0860100000000001976a91421919b94ae5cefcdf0271191459157cdb41c4cbf88aca6240700"
 
+# binary forms, decoded once at import
+unsigned_bytes = bfh(unsigned_blob)
+signed_bytes = bfh(signed_blob)
+
 class TestBCDataStream(unittest.TestCase):
 
     def test_compact_size(self):
@@ -53,6 +58,12 @@ class TestBCDataStream(unittest.TestCase):
 
 class TestTransaction(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # parsed once; tests that mutate it must work on a deep copy
+        cls._signed_tx = transaction.Transaction(signed_bytes)
+        cls._signed_tx.deserialize()
+
     def test_tx_unsigned(self):
         expected = {
             'inputs': [{
@@ -136,6 +147,21 @@ class TestTransaction(unittest.TestCase):
         self.assertEqual(tx.estimated_weight(), 764)
         self.assertEqual(tx.estimated_size(), 191)
 
+    def test_tx_from_bytes(self):
+        self.assertEqual(self._signed_tx.raw, signed_blob)
+        self.assertEqual(transaction.deserialize(unsigned_bytes), transaction.deserialize(unsigned_blob))
+        self.assertEqual(transaction.Transaction(unsigned_bytes).deserialize(),
+                         transaction.Transaction(unsigned_blob).deserialize())
+
+    def test_txid_cache(self):
+        tx = copy.deepcopy(self._signed_tx)
+        txid = tx.txid()
+        self.assertEqual(txid, tx.txid())
+        tx.raw = None
+        self.assertEqual(txid, tx.txid())
+        tx.add_outputs([(TYPE_ADDRESS, 'GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb', 1000)])
+        self.assertNotEqual(txid, tx.txid())
+
     def test_errors(self):
         with self.assertRaises(TypeError):
             transaction.Transaction.pay_script(output_type=None, addr='')
@@ -1,5 +1,5 @@
 import unittest
-from lib.util import format_satoshis, parse_URI
+from lib.util import format_satoshis, parse_URI, bh2u
 
 class TestUtil(unittest.TestCase):
 
@@ -18,6 +18,18 @@ class TestUtil(unittest.TestCase):
         expected = "-0.00001234"
         self.assertEqual(expected, result)
 
+    def test_format_satoshis_large(self):
+        result = format_satoshis(99999999999999999)
+        expected = "999999999.99999999"
+        self.assertEqual(expected, result)
+
+    def test_bh2u(self):
+        self.assertEqual('01020a', bh2u(bytes((1, 2, 10))))
+        self.assertEqual('01020a', bh2u(bytearray((1, 2, 10))))
+        self.assertEqual('01020a', bh2u(memoryview(bytes((1, 2, 10)))))
+        self.assertRaises(TypeError, bh2u, 1.5)
+        self.assertRaises(TypeError, bh2u, '01020a')
+
     def _do_test_parse_URI(self, uri, expected):
         result = parse_URI(uri)
         self.assertEqual(expected, result)
@@ -59,6 +71,16 @@ class TestUtil(unittest.TestCase):
         self._do_test_parse_URI('xgox:?r=http://domain.tld/page?h%3D2a8628fc2fbe',
                                 {'r': 'http://domain.tld/page?h=2a8628fc2fbe'})
 
+    def test_parse_URI_whitespace(self):
+        for uri in ['xgox:GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb\n',
+                    'xgox:GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb\r\n',
+                    ' xgox:GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb']:
+            self._do_test_parse_URI(uri, {'address': 'GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb'})
+
+    def test_parse_URI_control_chars_in_query(self):
+        self._do_test_parse_URI('xgox:GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb?message=a\tb',
+                                {'address': 'GYastr1RxW8Pjcn1Y8jQCZd65wcGVAf8Xb', 'message': 'ab', 'memo': 'ab'})
+
     def test_parse_URI_invalid_address(self):
         self.assertRaises(BaseException, parse_URI, 'xgox:invalidaddress')
 
@@ -4,8 +4,11 @@ import sys
 import unittest
 import os
 import json
+import zlib
+from unittest import mock
 
 from io import StringIO
+from lib import bitcoin
 from lib.storage import WalletStorage, FINAL_SEED_VERSION
 
 
@@ -67,3 +70,23 @@ class TestWalletStorage(WalletTestCase):
         with open(self.wallet_path, "r") as f:
             contents = f.read()
         self.assertEqual(some_dict, json.loads(contents))
+
+    # encrypted with get_key('secret') by a release without libsecp256k1 support
+    encrypted_blob = 'QklFMQNgDq0UMkt1q2GKWflHfpupflLr9vA75ihdXYBpvfBouTlkyZuJf3UpOqufM4fyXf+MuGqasxUOlNa26F2DYQ3onSSNttGBrqSAgFAcPdCYyc0ch9DjVtuOn4GHM4xXDzw='
+
+    def _do_test_get_key_round_trip(self):
+        storage = WalletStorage(self.wallet_path)
+        ec_key = storage.get_key('secret')
+        self.assertEqual('0350dc8a6dbc806770d7476e1f074493cb37cafc37949d7bd21fec258bd86996a3', ec_key.get_public_key())
+        self.assertEqual(b'{"seed_version": 16}', zlib.decompress(ec_key.decrypt_message(self.encrypted_blob)))
+
+        plaintext = zlib.compress(b'{"a": "b"}')
+        encrypted = bitcoin.encrypt_message(plaintext, ec_key.get_public_key())
+        self.assertEqual(plaintext, storage.get_key('secret').decrypt_message(encrypted))
+
+    def test_get_key_round_trip(self):
+        self._do_test_get_key_round_trip()
+
+    def test_get_key_round_trip_pure_python(self):
+        with mock.patch.object(bitcoin, 'coincurve', None):
+            self._do_test_get_key_round_trip()
@@ -53,6 +53,14 @@ class NotRecognizedRedeemScript(Exception):
     pass
 
 
+# payload formats of the 0xfd, 0xfe and 0xff compact size prefixes
+_COMPACT_SIZE_FORMATS = {
+    253: struct.Struct('<H'),
+    254: struct.Struct('<I'),
+    255: struct.Struct('<Q'),
+}
+
+
 class BCDataStream(object):
     def __init__(self):
         self.input = None
@@ -122,16 +130,18 @@ class BCDataStream(object):
     def read_compact_size(self):
         try:
             size = self.input[self.read_cursor]
-            self.read_cursor += 1
-            if size == 253:
-                size = self._read_num('<H')
-            elif size == 254:
-                size = self._read_num('<I')
-            elif size == 255:
-                size = self._read_num('<Q')
-            return size
         except IndexError:
             raise SerializationError("attempt to read past end of buffer")
+        self.read_cursor += 1
+        if size < 253:
+            return size
+        fmt = _COMPACT_SIZE_FORMATS[size]
+        try:
+            (size,) = fmt.unpack_from(self.input, self.read_cursor)
+        except Exception as e:
+            raise SerializationError(e)
+        self.read_cursor += fmt.size
+        return size
 
     def write_compact_size(self, size):
         if size < 0:
@@ -440,7 +450,7 @@ def parse_output(vds, i):
 
 def deserialize(raw):
     vds = BCDataStream()
-    vds.write(bfh(raw))
+    vds.write(raw if isinstance(raw, (bytes, bytearray)) else bfh(raw))
     d = {}
     start = vds.read_cursor
     d['version'] = vds.read_int32()
@@ -477,16 +487,22 @@ class Transaction:
         return self.raw
 
     def __init__(self, raw):
+        self._raw_bytes = None, None    # (raw, decoded raw) from bytes input
         if raw is None:
             self.raw = None
         elif isinstance(raw, str):
             self.raw = raw.strip() if raw else None
         elif isinstance(raw, dict):
             self.raw = raw['hex']
+        elif isinstance(raw, (bytes, bytearray)):
+            self.raw = bh2u(raw) if raw else None
+            # deserialize() parses these directly instead of decoding raw
+            self._raw_bytes = self.raw, bytes(raw)
         else:
             raise BaseException("cannot initialize transaction", raw)
         self._inputs = None
         self._outputs = None
+        self._txid_cache = None, None   # (raw, txid) of the last txid() call
         self.locktime = 0
         self.version = 1
 
@@ -552,7 +568,9 @@ class Transaction:
             #self.raw = self.serialize()
         if self._inputs is not None:
             return
-        d = deserialize(self.raw)
+        raw, raw_bytes = self._raw_bytes
+        self._raw_bytes = None, None
+        d = deserialize(raw_bytes if raw is not None and raw is self.raw else self.raw)
         self._inputs = d['inputs']
         self.time = d['time']
         self._outputs = [(x['type'], x['address'], x['value']) for x in d['outputs']]
@@ -688,6 +706,7 @@ class Transaction:
         # See https://github.com/kristovatlas/rfc/blob/master/bips/bip-li01.mediawiki
         self._inputs.sort(key = lambda i: (i['prevout_hash'], i['prevout_n']))
         self._outputs.sort(key = lambda o: (o[2], self.pay_script(o[0], o[1])))
+        self.raw = None
 
     def serialize_output(self, output):
         output_type, addr, amount = output
@@ -728,8 +747,16 @@ class Transaction:
     def txid(self):
         if not self.is_complete():
             return None
+        # raw is reset or rewritten whenever inputs or outputs change,
+        # so it is a safe key for the hash of the serialization
+        raw = self.raw
+        if raw is not None and self._txid_cache[0] == raw:
+            return self._txid_cache[1]
         ser = self.serialize()
-        return bh2u(Hash(bfh(ser))[::-1])
+        txid = bh2u(Hash(bfh(ser))[::-1])
+        if raw is not None:
+            self._txid_cache = raw, txid
+        return txid
 
     def add_inputs(self, inputs):
         self._inputs.extend(inputs)
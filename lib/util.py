@@ -25,6 +25,7 @@ import os, sys, re, json
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
+from locale import localeconv
 import traceback
 import urllib
 import threading
@@ -327,6 +328,18 @@ def bh2u(x):
     return hfu(x).decode('ascii')
 
 
+if hasattr(bytes, 'hex'):
+    # python 3.5+: bytes, bytearray and memoryview encode themselves
+    # without the intermediate bytes object and decode step
+    _bh2u = bh2u
+
+    def bh2u(x):
+        if isinstance(x, (bytes, bytearray, memoryview)):
+            return x.hex()
+        return _bh2u(x)
+    bh2u.__doc__ = _bh2u.__doc__
+
+
 def user_dir():
     if 'ANDROID_DATA' in os.environ:
         return android_check_data_dir()
@@ -349,19 +362,18 @@ def format_satoshis_plain(x, decimal_point = 8):
 
 
 def format_satoshis(x, is_diff=False, num_zeros = 0, decimal_point = 8, whitespaces=False):
-    from locale import localeconv
     if x is None:
         return 'unknown'
     x = int(x)  # Some callers pass Decimal
-    scale_factor = pow (10, decimal_point)
-    integer_part = "{:n}".format(int(abs(x) / scale_factor))
+    # integer division: exact for any amount, unlike going through a float
+    integer, fract = divmod(abs(x), pow(10, decimal_point))
+    integer_part = "{:n}".format(integer)
     if x < 0:
         integer_part = '-' + integer_part
     elif is_diff:
         integer_part = '+' + integer_part
     dp = localeconv()['decimal_point']
-    fract_part = ("{:0" + str(decimal_point) + "}").format(abs(x) % scale_factor)
-    fract_part = fract_part.rstrip('0')
+    fract_part = "{:0{}}".format(fract, decimal_point).rstrip('0')
     if len(fract_part) < num_zeros:
         fract_part += "0" * (num_zeros - len(fract_part))
     result = integer_part + dp + fract_part
@@ -470,32 +482,41 @@ def block_explorer_URL(config, kind, item):
 #_ud = re.compile('%([0-9a-hA-H]{2})', re.MULTILINE)
 #urldecode = lambda x: _ud.sub(lambda m: chr(int(m.group(1), 16)), x)
 
+# scheme, path (the address) and query of a payment URI; fragment dropped
+_URI_RE = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*):([^?#]*)(?:\?([^#]*))?')
+# characters urlparse removes from anywhere in a URL
+_URI_UNSAFE_CHARS = dict.fromkeys(map(ord, '\t\r\n'))
+
 def parse_URI(uri, on_pr=None):
     from . import bitcoin
     from .bitcoin import COIN
 
+    # clipboard, QR and command line input: same cleanup as urlparse
+    uri = uri.strip().translate(_URI_UNSAFE_CHARS)
+
     if ':' not in uri:
         if not bitcoin.is_address(uri):
             raise BaseException("Not a Xgox address")
         return {'address': uri}
 
-    u = urllib.parse.urlparse(uri)
-    if u.scheme != 'xgox':
+    m = _URI_RE.match(uri)
+    if not m or m.group(1).lower() != 'xgox':
         raise BaseException("Not a Xgox URI")
-    address = u.path
-
-    # python for android fails to parse query
-    if address.find('?') > 0:
-        address, query = u.path.split('?')
-        pq = urllib.parse.parse_qs(query)
-    else:
-        pq = urllib.parse.parse_qs(u.query)
-
-    for k, v in pq.items():
-        if len(v)!=1:
+    address, query = m.group(2), m.group(3)
+
+    out = {}
+    for field in query.split('&') if query else ():
+        k, eq, v = field.partition('=')
+        if not v:
+            continue  # like parse_qs, skip blank values
+        if '%' in k or '+' in k:
+            k = urllib.parse.unquote_plus(k)
+        if '%' in v or '+' in v:
+            v = urllib.parse.unquote_plus(v)
+        if k in out:
             raise Exception('Duplicate Key', k)
+        out[k] = v
 
-    out = {k: v[0] for k, v in pq.items()}
     if address:
         if not bitcoin.is_address(address):
             raise BaseException("Invalid Xgox address:" + address)
@@ -11,7 +11,7 @@ try:
     from electrum_xgox.i18n import _
     from electrum_xgox.keystore import Hardware_KeyStore
     from ..hw_wallet import HW_PluginBase
-    from electrum_xgox.util import print_error, to_string, UserCancelled
+    from electrum_xgox.util import print_error, to_string, to_bytes, UserCancelled
 
     import time
     import hid
@@ -111,8 +111,7 @@ class DigitalBitbox_Client():
 
 
     def stretch_key(self, key):
-        import pbkdf2, hmac
-        return binascii.hexlify(pbkdf2.PBKDF2(key, b'Digital Bitbox', iterations = 20480, macmodule = hmac, digestmodule = hashlib.sha512).read(64))
+        return binascii.hexlify(hashlib.pbkdf2_hmac('sha512', to_bytes(key, 'utf8'), b'Digital Bitbox', iterations = 20480))
 
 
     def backup_password_dialog(self):
@@ -6,10 +6,12 @@ from setuptools import setup
 import os
 import sys
 import platform
-import imp
+import re
 import argparse
 
-version = imp.load_source('version', 'lib/version.py')
+# read the version without executing lib/version.py
+with open('lib/version.py') as f:
+    ELECTRUM_VERSION = re.search(r"ELECTRUM_VERSION\s*=\s*['\"]([^'\"]+)", f.read()).group(1)
 
 if sys.version_info[:3] < (3, 4, 0):
     sys.exit("Error: Electrum-XGOX requires Python version >= 3.4.0...")
@@ -34,11 +36,10 @@ if platform.system() in ['Linux', 'FreeBSD', 'DragonFly']:
 
 setup(
     name="Electrum-XGOX",
-    version=version.ELECTRUM_VERSION,
+    version=ELECTRUM_VERSION,
     install_requires=[
         'pyaes>=0.1a1',
         'ecdsa>=0.9',
-        'pbkdf2',
         'requests',
         'qrcode',
         'protobuf',